@@ -0,0 +1,236 @@
+"""
+Native X11 selection backend for MultiClip (python-xlib).
+
+Talks to the X server directly instead of forking xclip for every copy or
+paste. One connection owns CLIPBOARD/PRIMARY and serves SelectionRequest
+events from a background thread; a second connection is used to read
+selections synchronously from the hotkey thread.
+
+Anything this backend can't handle (no X display, INCR transfers, very
+large payloads) is reported back as None/False so the caller can fall back
+to the subprocess helpers. An unowned selection is reported as NO_OWNER,
+which is an answer, not a failure.
+"""
+
+import select
+import threading
+import time
+
+import Xlib.threaded  # noqa: F401  (makes Display safe to share between threads)
+from Xlib import X, Xatom, display
+from Xlib.ext import xfixes
+from Xlib.protocol import event
+
+# Stay well below the core protocol request limit (256KiB); bigger payloads
+# would need the INCR protocol, which is left to xclip.
+MAX_INLINE_BYTES = 200 * 1024
+
+READ_TIMEOUT = 0.5
+
+# Conversions rotate through this many target properties, so a reply that
+# straggles in after its request timed out can't be read as a later one's.
+PROP_POOL = 8
+
+# get_text() result when nobody owns the selection, as opposed to None when
+# an owner exists but the transfer failed.
+NO_OWNER = object()
+
+
+class XSelectionBackend:
+    def __init__(self):
+        self._owner = display.Display()
+        self._reader = display.Display()
+
+        self._owner_win = self._create_window(self._owner)
+        self._reader_win = self._create_window(self._reader)
+
+        self.CLIPBOARD = self._owner.intern_atom("CLIPBOARD")
+        self.PRIMARY = Xatom.PRIMARY
+        self._utf8 = self._owner.intern_atom("UTF8_STRING")
+        self._text = self._owner.intern_atom("TEXT")
+        self._targets = self._owner.intern_atom("TARGETS")
+        self._incr = self._owner.intern_atom("INCR")
+        self._props = [self._reader.intern_atom(f"MULTICLIP_SELECTION_{i}") for i in range(PROP_POOL)]
+        self._next_prop = 0
+
+        # selection atom -> (text, utf-8 bytes) we currently own it with
+        self._owned = {}
+        self._owned_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+        # With XFixes the server tells us whenever a selection changes hands,
+        # so the last read stays valid until then, without asking the owner.
+        # selection atom -> change count; selection atom -> (count, owner, text)
+        self._changes = {}
+        self._read_cache = {}
+        self._watching = self._reader.has_extension("XFIXES")
+        if self._watching:
+            self._reader.xfixes_query_version()
+            mask = (
+                xfixes.XFixesSetSelectionOwnerNotifyMask
+                | xfixes.XFixesSelectionWindowDestroyNotifyMask
+                | xfixes.XFixesSelectionClientCloseNotifyMask
+            )
+            for sel in (self.PRIMARY, self.CLIPBOARD):
+                self._reader.xfixes_select_selection_input(self._reader_win, sel, mask)
+            self._reader.flush()
+
+        t = threading.Thread(target=self._serve_forever, name="multiclip-x11", daemon=True)
+        t.start()
+
+    @staticmethod
+    def _create_window(d):
+        root = d.screen().root
+        win = root.create_window(0, 0, 1, 1, 0, X.CopyFromParent)
+        d.flush()
+        return win
+
+    # Writing: take ownership and answer requests
+
+    def set_text(self, text: str) -> bool:
+        """Own CLIPBOARD and PRIMARY with text. Return False if too large."""
+        payload = text.encode("utf-8")
+        if len(payload) > MAX_INLINE_BYTES:
+            return False
+
+        # Encoded once here and shared by both selections and every request.
+        with self._owned_lock:
+            self._owned[self.CLIPBOARD] = (text, payload)
+            self._owned[self.PRIMARY] = (text, payload)
+        self._owner_win.set_selection_owner(self.CLIPBOARD, X.CurrentTime)
+        self._owner_win.set_selection_owner(self.PRIMARY, X.CurrentTime)
+        self._owner.flush()
+        return True
+
+    def _serve_forever(self):
+        while True:
+            try:
+                ev = self._owner.next_event()
+            except Exception:
+                return
+            if ev.type == X.SelectionRequest:
+                self._answer(ev)
+            elif ev.type == X.SelectionClear:
+                with self._owned_lock:
+                    self._owned.pop(ev.atom, None)
+
+    def _answer(self, ev):
+        # Obsolete clients leave property as None; reply on the target then.
+        prop = ev.property if ev.property != X.NONE else ev.target
+        with self._owned_lock:
+            owned = self._owned.get(ev.selection)
+
+        if owned is None:
+            prop = X.NONE
+        elif ev.target == self._targets:
+            ev.requestor.change_property(
+                prop, Xatom.ATOM, 32, [self._targets, self._utf8, self._text, Xatom.STRING]
+            )
+        elif ev.target in (self._utf8, self._text):
+            ev.requestor.change_property(prop, self._utf8, 8, owned[1])
+        elif ev.target == Xatom.STRING:
+            ev.requestor.change_property(prop, Xatom.STRING, 8, owned[0].encode("latin-1", "replace"))
+        else:
+            prop = X.NONE
+
+        reply = event.SelectionNotify(
+            time=ev.time,
+            requestor=ev.requestor,
+            selection=ev.selection,
+            target=ev.target,
+            property=prop,
+        )
+        ev.requestor.send_event(reply)
+        self._owner.flush()
+
+    # Reading: convert a selection into a property on our own window
+
+    def get_text(self, selection):
+        """
+        Return the text held in selection, NO_OWNER if nobody owns it, or
+        None if the owner couldn't hand it over inline (refused UTF8_STRING,
+        INCR transfer, timeout).
+
+        While no XFixes change notification arrived for selection since the
+        last read, the cached text is returned without contacting the owner.
+        """
+        with self._read_lock:
+            # GetSelectionOwner is a server round trip, so any change event
+            # generated before it is queued by the time the reply arrives.
+            owner = self._reader.get_selection_owner(selection)
+            owner_id = getattr(owner, "id", owner)
+            self._drain_events()
+            if owner_id == X.NONE:
+                return NO_OWNER
+
+            changes = self._changes.get(selection, 0)
+            cached = self._read_cache.get(selection)
+            if cached is not None and cached[:2] == (changes, owner_id):
+                return cached[2]
+
+            reply = self._convert(selection, self._utf8)
+            if reply is None or reply.property_type == self._incr:
+                return None
+            value = reply.value
+            text = value if isinstance(value, str) else bytes(value).decode("utf-8", "replace")
+
+            # A change seen during the transfer bumped the count, so this
+            # entry can't be hit afterwards.
+            if self._watching:
+                self._read_cache[selection] = (changes, owner_id, text)
+            return text
+
+    def _convert(self, selection, target):
+        """Ask the owner for selection as target; return the property reply or None."""
+        prop = self._props[self._next_prop]
+        self._next_prop = (self._next_prop + 1) % PROP_POOL
+
+        self._reader_win.convert_selection(selection, target, prop, X.CurrentTime)
+        self._reader.flush()
+
+        ev = self._wait_for_notify(selection, target, prop)
+        if ev is None or ev.property == X.NONE:
+            return None
+
+        reply = self._reader_win.get_full_property(prop, X.AnyPropertyType)
+        self._reader_win.delete_property(prop)
+        self._reader.flush()
+        return reply
+
+    def _handle_event(self, ev):
+        if isinstance(ev, xfixes.SelectionNotify):
+            self._changes[ev.selection] = self._changes.get(ev.selection, 0) + 1
+
+    def _drain_events(self):
+        while self._reader.pending_events():
+            self._handle_event(self._reader.next_event())
+
+    def _wait_for_notify(self, selection, target, prop):
+        """
+        Wait for the SelectionNotify answering this request. Replies to
+        earlier, timed-out requests don't match and are dropped.
+        """
+        deadline = time.monotonic() + READ_TIMEOUT
+        while True:
+            while self._reader.pending_events():
+                ev = self._reader.next_event()
+                if (
+                    ev.type == X.SelectionNotify
+                    and ev.selection == selection
+                    and ev.target == target
+                    and ev.property in (prop, X.NONE)
+                ):
+                    return ev
+                self._handle_event(ev)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            select.select([self._reader], [], [], remaining)
+
+
+def start():
+    """Connect to $DISPLAY and return a backend, or None if that fails."""
+    try:
+        return XSelectionBackend()
+    except Exception:
+        return None
@@ -3,21 +3,55 @@
 MultiClip — multi-slot clipboard daemon with OS-aware clipboard backends.
 
 This version auto-detects Linux vs macOS and uses the proper clipboard commands:
- - Linux: xclip (preferred) or wl-copy (Wayland) or pyperclip fallback
+ - Linux: native X11 via python-xlib (preferred), xclip, wl-copy (Wayland) or pyperclip fallback
  - macOS: pbcopy / pbpaste
 """
 
+import functools
+import hashlib
 import json
 import os
 import sys
 import subprocess
-import platform
+import queue
 import shutil
+import signal
+import tempfile
+import threading
+import time
 from datetime import datetime, timezone
 
 import click
 
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
 DATA_FILE = os.path.expanduser("~/.multiclip.json")
+# Append-only log of assigns made since DATA_FILE was last written.
+LOG_FILE = os.path.expanduser("~/.multiclip.log")
+
+# Fold the operation log back into DATA_FILE after this many appends.
+COMPACT_EVERY = 200
+
+# Repeated assigns of one slot within this many seconds (auto-repeat of a
+# held hotkey) are dropped instead of each reading the selection again.
+ASSIGN_DEBOUNCE = 0.05
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a non-negative int from the environment, ignoring junk values."""
+    try:
+        return max(0, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+# Keep only the most recent history entries so the data file stays bounded.
+HISTORY_MAX = _env_int("MULTICLIP_HISTORY_MAX", 500)
 
 
 
@@ -27,32 +61,262 @@ def utc_now():
     return datetime.now(timezone.utc).isoformat()
 
 
-def load_data():
+def json_dumps(data, indent=True) -> bytes:
+    """Serialize to UTF-8 JSON, using orjson when installed."""
+    if _HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, indent=2).encode("utf-8")
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(raw: bytes):
+    if _HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def content_ref(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def intern_entry(data, entry):
     """
-    Load persistent data safely. Ensure required keys exist.
+    Return entry with its inline "content" moved into data["blobs"], so
+    identical text in several slots / history rows is stored only once.
     """
-    if not os.path.exists(DATA_FILE):
-        return {"slots": {}, "history": []}
+    if "content" not in entry:
+        return entry
+    text = entry["content"]
+    ref = content_ref(text)
+    data["blobs"].setdefault(ref, text)
+    # "ref" takes the place of "content", keeping the key order.
+    return {("ref" if k == "content" else k): (ref if k == "content" else v) for k, v in entry.items()}
 
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        return {"slots": {}, "history": []}
 
+def normalize(data):
+    """Ensure required keys exist and convert inline content to blob refs."""
     data.setdefault("slots", {})
     data.setdefault("history", [])
+    data.setdefault("blobs", {})
+    # Sequence number of the last logged assign folded into this data.
+    data.setdefault("seq", 0)
+
+    data["slots"] = {k: intern_entry(data, v) for k, v in data["slots"].items()}
+    data["history"] = [intern_entry(data, h) for h in data["history"]]
+    return data
+
+
+def inline_content(data):
+    """
+    Return data in the plain export format: content stored next to each slot
+    and history row, without the blob table or other bookkeeping.
+    """
+    blobs = data["blobs"]
+
+    def expand(entry):
+        # Rebuild key by key so "content" sits where "ref" was.
+        return {
+            ("content" if k == "ref" else k): (blobs.get(v, "") if k == "ref" else v)
+            for k, v in entry.items()
+        }
+
+    return {
+        "slots": {k: expand(v) for k, v in data["slots"].items()},
+        "history": [expand(h) for h in data["history"]],
+    }
+
+
+def slot_content(data, slot):
+    """Return the text stored in slot, or None if it is empty."""
+    entry = data["slots"].get(slot)
+    if entry is None:
+        return None
+    return data["blobs"].get(entry["ref"], "")
+
+
+def apply_op(data, op):
+    """
+    Apply one logged assign to in-memory data. Ops whose seq the data
+    already covers are skipped (returns False), so replaying a log on top
+    of a snapshot that includes part of it is harmless.
+    """
+    seq = op.get("seq")
+    if seq is not None:
+        if seq <= data["seq"]:
+            return False
+        data["seq"] = seq
+
+    entry = {k: v for k, v in intern_entry(data, op).items() if k != "seq"}
+    data["slots"][op["slot"]] = {
+        "ref": entry["ref"],
+        "time": op["time"],
+    }
+
+    data["history"].append(entry)
+    history = data["history"]
+    if len(history) > HISTORY_MAX:
+        del history[:len(history) - HISTORY_MAX]
+    return True
+
+
+def snapshot(data) -> bytes:
+    """Drop blobs nothing refers to any more and serialize data."""
+    live = {e["ref"] for e in data["slots"].values()}
+    live.update(h["ref"] for h in data["history"])
+    for ref in [r for r in data["blobs"] if r not in live]:
+        del data["blobs"][ref]
+    # Machine-owned file: compact. `export` is what produces readable JSON.
+    return json_dumps(data, indent=False)
+
 
+def load_data():
+    """
+    Load persistent data safely. Ensure required keys exist.
+    Assigns logged since the last snapshot are replayed on top.
+    """
+    # If the daemon compacts between our reading the snapshot and the log,
+    # the log we find no longer continues that snapshot (it was folded into
+    # a newer one and removed or restarted). Detect that by the snapshot's
+    # stamp changing underneath us and read both again.
+    for _ in range(5):
+        stamp = data_file_stamp()
+        data = _read_snapshot()
+        try:
+            with open(LOG_FILE, "rb") as f:
+                for line in f:
+                    try:
+                        apply_op(data, json_loads(line))
+                    except Exception:
+                        # torn last line after a crash
+                        continue
+        except FileNotFoundError:
+            pass
+        if data_file_stamp() == stamp:
+            break
     return data
 
 
+def _read_snapshot():
+    data = None
+    if os.path.exists(DATA_FILE):
+        try:
+            with open(DATA_FILE, "rb") as f:
+                data = json_loads(f.read())
+        except Exception:
+            data = None
+    if data is None:
+        data = {}
+    return normalize(data)
+
+
+def data_file_stamp():
+    """
+    Return (st_ino, st_mtime_ns) of DATA_FILE, or None if it doesn't exist.
+    Every save renames a fresh inode into place, so the inode catches
+    rewrites that a coarse mtime alone could miss.
+    """
+    try:
+        st = os.stat(DATA_FILE)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
 def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    """
+    Write a full snapshot. The operation log is left alone: a running daemon
+    may still be appending to it, and ops up to data["seq"] are skipped on
+    replay anyway. Only the daemon, as the log's sole writer, removes it.
+    """
+    write_snapshot(snapshot(data))
+
+
+def write_snapshot(payload: bytes):
+    """Atomically replace DATA_FILE with payload; return the new file's stamp."""
+    # Write next to the target and rename over it, so a crash mid-write
+    # leaves the previous snapshot intact instead of a truncated file.
+    # The temp name is unique per call so the daemon and a CLI command
+    # saving at the same time don't write into (or rename away) each
+    # other's file. mkstemp creates it 0o600, since it holds everything
+    # the user copied; plain fd I/O, no file object per save.
+    # The data is fsynced before the rename and the directory after it, so
+    # once this returns the new snapshot is on disk and the daemon may drop
+    # the operation log it replaces.
+    data_dir = os.path.dirname(DATA_FILE)
+    fd, tmp = tempfile.mkstemp(prefix=".multiclip.", suffix=".tmp", dir=data_dir)
+    try:
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+            # Inode and mtime survive the rename: this is the stamp of the
+            # file we wrote, whatever lands at DATA_FILE afterwards.
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, DATA_FILE)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(data_dir)
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def _fsync_dir(path):
+    # Makes the rename durable; directories can't be opened on Windows.
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def open_log():
+    """
+    Open LOG_FILE for unbuffered appends. If a crash left a torn last line,
+    terminate it first so the next op starts on a line of its own instead
+    of being glued onto the fragment (and skipped on every replay).
+    """
+    f = open(LOG_FILE, "a+b", buffering=0)
+    try:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def append_ops(f, ops):
+    """Record assigns to the open log file without rewriting the data file."""
+    # f is unbuffered, so write() may be short; finish the batch so a
+    # line is never torn in the middle of the log.
+    view = memoryview(b"".join(json_dumps(op, indent=False) + b"\n" for op in ops))
+    while view:
+        view = view[f.write(view):]
+
+
+# (epoch second, "HH:MM:SS"); strftime only runs once the second rolls over.
+_log_stamp = (0, "")
 
 
 def log(msg):
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
+    global _log_stamp
+    now = int(time.time())
+    stamp = _log_stamp
+    if stamp[0] != now:
+        stamp = _log_stamp = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+    print(f"[{stamp[1]}] {msg}", flush=True)
 
 
 def has_cmd(name: str) -> bool:
@@ -63,7 +327,16 @@ def has_cmd(name: str) -> bool:
 
 # OS / Clipboard helpers
 
-PLATFORM = platform.system()  # "Linux", "Darwin", "Windows", etc.
+# Same names platform.system() reports ("Linux", "Darwin", "Windows", ...),
+# derived from the interpreter's constant instead of querying uname.
+if sys.platform.startswith("linux"):
+    PLATFORM = "Linux"
+elif sys.platform == "darwin":
+    PLATFORM = "Darwin"
+elif sys.platform == "win32":
+    PLATFORM = "Windows"
+else:
+    PLATFORM = sys.platform.capitalize()
 
 
 try:
@@ -73,6 +346,171 @@ try:
 except Exception:
     _HAS_PYPERCLIP = False
 
+try:
+    import _xlib_backend
+
+    _HAS_XLIB = True
+except Exception:
+    _HAS_XLIB = False
+
+# Native X11 selection backend; connected by the daemon on Linux when
+# python-xlib is available, otherwise the helper commands below are used.
+_NATIVE = None
+
+
+# Resolve helper commands once; walking $PATH on every hotkey is wasted work.
+_HAS_XCLIP = has_cmd("xclip")
+_HAS_WL_COPY = has_cmd("wl-copy")
+_HAS_WL_PASTE = has_cmd("wl-paste")
+_HAS_PBCOPY = has_cmd("pbcopy")
+_HAS_PBPASTE = has_cmd("pbpaste")
+
+
+def _pyperclip_get() -> str:
+    if _HAS_PYPERCLIP:
+        return pyperclip.paste() or ""
+    return ""
+
+
+# Windows bumps a sequence number on every clipboard change; while it is
+# unchanged the last read is still valid.
+_win_clip_cache = [None, ""]
+
+
+def _windows_get_primary() -> str:
+    import ctypes
+
+    seq = ctypes.windll.user32.GetClipboardSequenceNumber()
+    if seq and seq == _win_clip_cache[0]:
+        return _win_clip_cache[1]
+    text = _pyperclip_get()
+    _win_clip_cache[:] = [seq, text]
+    return text
+
+
+def _pyperclip_set(text: str) -> None:
+    if _HAS_PYPERCLIP:
+        pyperclip.copy(text)
+
+
+def _read_cmd(cmd):
+    """
+    Run a clipboard helper and return its stripped output, or None if it
+    failed. Output is read as bytes and decoded once, skipping text-mode
+    pipes and their incremental decoder.
+    """
+    p = subprocess.run(cmd, capture_output=True)
+    if p.returncode != 0:
+        return None
+    # str.strip() after decoding: also trims Unicode whitespace (NBSP, ...),
+    # same as the native path.
+    return p.stdout.decode("utf-8", "replace").strip()
+
+
+def _darwin_get_primary() -> str:
+    # macOS: use pbpaste to read clipboard (no PRIMARY)
+    if _HAS_PBPASTE:
+        return _read_cmd(["pbpaste"]) or ""
+    return _pyperclip_get()
+
+
+def _linux_get_primary() -> str:
+    if _NATIVE is not None:
+        # Only an unowned PRIMARY falls back to CLIPBOARD; a failed transfer
+        # (STRING-only owner, INCR) goes to the helpers, which handle both.
+        text = _NATIVE.get_text(_NATIVE.PRIMARY)
+        if text is _xlib_backend.NO_OWNER:
+            text = _NATIVE.get_text(_NATIVE.CLIPBOARD)
+            if text is _xlib_backend.NO_OWNER:
+                return ""
+        if text is not None:
+            return text.strip()
+
+    if _HAS_XCLIP:
+        text = _read_cmd(["xclip", "-selection", "primary", "-o"])
+        if text is not None:
+            return text
+
+    if _HAS_WL_PASTE:
+        # wl-paste might support --primary; try it, else try default
+        try:
+            text = _read_cmd(["wl-paste", "--primary"])
+            if text is not None:
+                return text
+        except Exception:
+            pass
+
+        text = _read_cmd(["wl-paste"])
+        if text is not None:
+            return text
+    # Fallback to CLIPBOARD via xclip
+    if _HAS_XCLIP:
+        text = _read_cmd(["xclip", "-selection", "clipboard", "-o"])
+        if text is not None:
+            return text
+    # Final fallback: pyperclip
+    return _pyperclip_get()
+
+
+def _darwin_set_clipboard(text: str) -> None:
+    # macOS: pbcopy writes to clipboard
+    if _HAS_PBCOPY:
+        subprocess.run(["pbcopy"], input=text.encode("utf-8"))
+        return
+    _pyperclip_set(text)
+
+
+def _feed(cmds, payload: bytes) -> None:
+    """
+    Pipe payload into each helper command. All helpers are spawned before any
+    is fed, so e.g. the CLIPBOARD and PRIMARY writers run side by side
+    instead of paying for two fork/exec round trips back to back.
+    """
+    procs = []
+    try:
+        for cmd in cmds:
+            procs.append(subprocess.Popen(cmd, stdin=subprocess.PIPE))
+    finally:
+        for p in procs:
+            p.communicate(payload)
+
+
+def _linux_set_clipboard(text: str) -> None:
+    # The native backend owns CLIPBOARD and PRIMARY from a single connection.
+    if _NATIVE is not None and _NATIVE.set_text(text):
+        return
+    payload = text.encode("utf-8")
+    # Prefer xclip (and also set PRIMARY), fallback to wl-copy, fallback to pyperclip
+    if _HAS_XCLIP:
+        # set CLIPBOARD, and PRIMARY too (so middle-click / selection-based pastes match)
+        _feed(
+            [
+                ["xclip", "-selection", "clipboard", "-i"],
+                ["xclip", "-selection", "primary", "-i"],
+            ],
+            payload,
+        )
+        return
+    if _HAS_WL_COPY:
+        # wl-copy for Wayland; set both CLIPBOARD and PRIMARY
+        _feed([["wl-copy"], ["wl-copy", "--primary"]], payload)
+        return
+    # final fallback: pyperclip, if available; otherwise silent noop
+    _pyperclip_set(text)
+
+
+# Backend picked once per process; other OS (Windows) go through pyperclip.
+_GET_PRIMARY = {
+    "Darwin": _darwin_get_primary,
+    "Linux": _linux_get_primary,
+    "Windows": _windows_get_primary,
+}.get(PLATFORM, _pyperclip_get)
+
+_SET_CLIPBOARD = {
+    "Darwin": _darwin_set_clipboard,
+    "Linux": _linux_set_clipboard,
+}.get(PLATFORM, _pyperclip_set)
+
 
 def get_primary_selection() -> str:
     """
@@ -81,54 +519,7 @@ def get_primary_selection() -> str:
     - macOS: pbpaste (macOS doesn't have X11 PRIMARY, so use clipboard)
     """
     try:
-        if PLATFORM == "Darwin":
-            # macOS: use pbpaste to read clipboard (no PRIMARY)
-            if has_cmd("pbpaste"):
-                p = subprocess.run(["pbpaste"], capture_output=True, text=True)
-                return p.stdout.strip() if p.returncode == 0 else ""
-            elif _HAS_PYPERCLIP:
-                return pyperclip.paste() or ""
-            else:
-                return ""
-        elif PLATFORM == "Linux":
-
-            if has_cmd("xclip"):
-                p = subprocess.run(
-                    ["xclip", "-selection", "primary", "-o"], capture_output=True, text=True
-                )
-                if p.returncode == 0:
-                    return p.stdout.strip()
-
-            if has_cmd("wl-paste"):
-                # wl-paste might support --primary; try it, else try default
-                try:
-                    p = subprocess.run(
-                        ["wl-paste", "--primary"], capture_output=True, text=True, check=False
-                    )
-                    if p.returncode == 0:
-                        return p.stdout.strip()
-                except Exception:
-                    pass
-
-                p = subprocess.run(["wl-paste"], capture_output=True, text=True)
-                if p.returncode == 0:
-                    return p.stdout.strip()
-            # Fallback to CLIPBOARD via xclip
-            if has_cmd("xclip"):
-                p = subprocess.run(
-                    ["xclip", "-selection", "clipboard", "-o"], capture_output=True, text=True
-                )
-                if p.returncode == 0:
-                    return p.stdout.strip()
-            # Final fallback: pyperclip
-            if _HAS_PYPERCLIP:
-                return pyperclip.paste() or ""
-            return ""
-        else:
-
-            if _HAS_PYPERCLIP:
-                return pyperclip.paste() or ""
-            return ""
+        return _GET_PRIMARY()
     except Exception:
         return ""
 
@@ -142,52 +533,7 @@ def set_clipboard(text: str) -> None:
         text = ""
 
     try:
-        if PLATFORM == "Darwin":
-            # macOS: pbcopy writes to clipboard
-            if has_cmd("pbcopy"):
-                subprocess.run(["pbcopy"], input=text, text=True)
-                return
-            elif _HAS_PYPERCLIP:
-                pyperclip.copy(text)
-                return
-            else:
-                return
-        elif PLATFORM == "Linux":
-            # Prefer xclip (and also set PRIMARY), fallback to wl-copy, fallback to pyperclip
-            if has_cmd("xclip"):
-                # set CLIPBOARD
-                subprocess.run(["xclip", "-selection", "clipboard", "-i"], input=text, text=True)
-                # set PRIMARY too (so middle-click / selection-based pastes match)
-                subprocess.run(["xclip", "-selection", "primary", "-i"], input=text, text=True)
-                return
-            if has_cmd("wl-copy"):
-                # wl-copy for Wayland; try to set both CLIPBOARD and PRIMARY if supported
-                try:
-                    subprocess.run(["wl-copy"], input=text.encode(), check=False)
-                except Exception:
-                    try:
-                        # fallback calling without bytes
-                        subprocess.run(["wl-copy"], input=text, text=True, check=False)
-                    except Exception:
-                        pass
-                
-                try:
-                    subprocess.run(["wl-copy", "--primary"], input=text.encode(), check=False)
-                except Exception:
-                    pass
-                return
-            # final fallback: pyperclip, if available
-            if _HAS_PYPERCLIP:
-                pyperclip.copy(text)
-                return
-            # nothing available — silent noop
-            return
-        else:
-            # Other OS (Windows): try pyperclip
-            if _HAS_PYPERCLIP:
-                pyperclip.copy(text)
-                return
-            return
+        _SET_CLIPBOARD(text)
     except Exception:
         # swallow exceptions to keep daemon alive
         return
@@ -213,8 +559,8 @@ def list():
         click.echo("No slots yet.")
         return
 
-    for k, v in sorted(data["slots"].items()):
-        preview = v["content"].replace("\n", " ")[:40]
+    for k in sorted(data["slots"]):
+        preview = slot_content(data, k).replace("\n", " ")[:40]
         click.echo(f"{k}: {preview}")
 
 
@@ -235,9 +581,9 @@ def clear(slot):
 @click.argument("path")
 def export(path):
     """Export data to JSON file"""
-    save_data(load_data())
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(load_data(), f, indent=2)
+    data = inline_content(load_data())
+    with open(path, "wb") as f:
+        f.write(json_dumps(data))
     click.echo("Exported successfully")
 
 
@@ -245,10 +591,11 @@ def export(path):
 @click.argument("path")
 def import_slots(path):
     """Import data from JSON file"""
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    data.setdefault("slots", {})
-    data.setdefault("history", [])
+    with open(path, "rb") as f:
+        data = json_loads(f.read())
+    normalize(data)
+    # Stay ahead of the current log so its ops aren't replayed over the import.
+    data["seq"] = max(data["seq"], load_data()["seq"])
     save_data(data)
     click.echo("Imported successfully")
 
@@ -256,6 +603,15 @@ def import_slots(path):
 
 # Daemon (the joker one)
 
+# Predefined slots: A–Z and 1–9, as slot -> (assign hotkey, paste hotkey)
+SLOTS = {
+    **{chr(c): (f"<ctrl>+{chr(c).lower()}", f"<alt>+{chr(c).lower()}") for c in range(65, 91)},
+    **{str(n): (f"<ctrl>+{n}", f"<alt>+{n}") for n in range(1, 10)},
+}
+
+SLOTS_LISTING = "".join(f"  {k}: assign {a} | paste {p}\n" for k, (a, p) in SLOTS.items())
+
+
 @cli.command(context_settings={"ignore_unknown_options": True})
 def daemon():
     """
@@ -268,65 +624,208 @@ def daemon():
         click.echo("Install dependencies: pip install pynput")
         sys.exit(1)
 
+    if PLATFORM == "Linux" and _HAS_XLIB:
+        global _NATIVE
+        _NATIVE = _xlib_backend.start()
+
     # On Linux ensure at least one clipboard helper exists; on macOS it's not required
     if PLATFORM == "Linux":
-        if not (has_cmd("xclip") or has_cmd("wl-copy") or _HAS_PYPERCLIP):
+        if not (_NATIVE or _HAS_XCLIP or _HAS_WL_COPY or _HAS_PYPERCLIP):
             click.echo("Install xclip or wl-clipboard (wl-copy) or ensure pyperclip is installed.")
             click.echo("Example (Debian/Ubuntu): sudo apt install xclip")
             sys.exit(1)
 
-    # Predefined slots: A–Z and 1–9
-    slots = {
-        **{chr(c): (f"<ctrl>+{chr(c).lower()}", f"<alt>+{chr(c).lower()}") for c in range(65, 91)},
-        **{str(n): (f"<ctrl>+{n}", f"<alt>+{n}") for n in range(1, 10)},
-    }
+    # Loaded once; hotkey callbacks work on this dict and only touch the disk
+    # on mutation. `clear` / `import` run while the daemon is up rewrite
+    # DATA_FILE, which shows up as a file stamp the daemon didn't produce
+    # itself: then (and only then) the file is parsed again.
+    data = load_data()
+    data_lock = threading.Lock()
+    disk = {"stamp": data_file_stamp(), "writing": False}
+
+    # A log left by an earlier session (crash, or killed before its exit
+    # compaction) is folded in now; otherwise sessions with fewer than
+    # COMPACT_EVERY assigns would let it grow forever.
+    if os.path.exists(LOG_FILE):
+        try:
+            disk["stamp"] = write_snapshot(snapshot(data))
+            os.remove(LOG_FILE)
+        except OSError as e:
+            log(f"compacting {LOG_FILE} failed: {e}")
+    # Ops applied to data but not yet in the log or a snapshot. A reload
+    # can't see them on disk, so they are re-applied on top of it.
+    unsaved = []
+
+    def refresh():
+        """Reload data if DATA_FILE was rewritten behind our back. Hold data_lock."""
+        if disk["writing"]:
+            return False
+        stamp = data_file_stamp()
+        if stamp == disk["stamp"]:
+            return False
+        data.clear()
+        data.update(load_data())
+        for op in unsaved:
+            apply_op(data, op)
+        disk["stamp"] = stamp
+        return True
+
+    def saved(seq):
+        """Forget unsaved ops up to seq once they are on disk. Hold data_lock."""
+        unsaved[:] = [op for op in unsaved if op["seq"] > seq]
+
+    # Disk I/O happens on this thread so hotkey callbacks never wait on it.
+    # Ops queued while a write is in flight are coalesced into the next one.
+    writer_q = queue.Queue()
+
+    def writer():
+        pending = 0
+        # Kept open between batches (unbuffered: one write() per batch) and
+        # closed whenever a snapshot replaces the log.
+        log_f = None
+        while True:
+            ops = [writer_q.get()]
+            while True:
+                try:
+                    ops.append(writer_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = None in ops
+            ops = [op for op in ops if op is not None]
+            pending += len(ops)
+
+            # Whatever goes wrong with one batch, keep the thread alive: ops
+            # stay in `unsaved` and `pending`, so a later batch or the exit
+            # compaction still gets them to disk.
+            try:
+                if pending >= COMPACT_EVERY or (stopping and pending):
+                    # Every op not yet on disk is already applied to data, so
+                    # the snapshot supersedes anything still queued.
+                    with data_lock:
+                        while True:
+                            try:
+                                if writer_q.get_nowait() is None:
+                                    stopping = True
+                            except queue.Empty:
+                                break
+                        # Don't clobber an external rewrite; refresh() keeps
+                        # our unsaved ops on top of it.
+                        refresh()
+                        payload = snapshot(data)
+                        snapshot_seq = data["seq"]
+                        disk["writing"] = True
+                    try:
+                        if log_f is not None:
+                            log_f.close()
+                            log_f = None
+                        stamp = write_snapshot(payload)
+                        # Everything logged so far is in the snapshot (and
+                        # would be skipped by seq if this removal never happens).
+                        try:
+                            os.remove(LOG_FILE)
+                        except FileNotFoundError:
+                            pass
+                        pending = 0
+                        with data_lock:
+                            saved(snapshot_seq)
+                            # Not a fresh stat() of the path: a CLI save landing
+                            # right after our rename must still look foreign.
+                            disk["stamp"] = stamp
+                    finally:
+                        with data_lock:
+                            disk["writing"] = False
+                elif ops:
+                    # If the log was unlinked under us (e.g. by hand), start a new one.
+                    if log_f is not None and os.fstat(log_f.fileno()).st_nlink == 0:
+                        log_f.close()
+                        log_f = None
+                    if log_f is None:
+                        log_f = open_log()
+                    append_ops(log_f, ops)
+                    with data_lock:
+                        saved(ops[-1]["seq"])
+            except Exception as e:
+                log(f"saving failed: {e!r}")
+                # A failed append may have left a partial line; reopening
+                # through open_log() terminates it before the next one.
+                if log_f is not None:
+                    log_f.close()
+                    log_f = None
+                if stopping:
+                    log(f"{len(unsaved)} assign(s) could not be saved")
+
+            if stopping:
+                if log_f is not None:
+                    log_f.close()
+                return
+
+    writer_thread = threading.Thread(target=writer, name="multiclip-writer", daemon=True)
+    writer_thread.start()
+
+    last_assign = {}
 
     def assign(slot):
+        now = time.monotonic()
+        if now - last_assign.get(slot, float("-inf")) < ASSIGN_DEBOUNCE:
+            return
+        last_assign[slot] = now
+
         text = get_primary_selection()
         if not text:
             log(f"{slot}: nothing selected")
             return
 
-        data = load_data()
-        data.setdefault("history", [])
-
-        data["slots"][slot] = {
-            "content": text,
-            "time": utc_now(),
-        }
-
-        data["history"].append({
+        op = {
             "slot": slot,
             "content": text,
             "time": utc_now(),
-        })
-
-        save_data(data)
+        }
+        with data_lock:
+            refresh()
+            # Re-assigning the same text (e.g. a held hotkey) changes nothing.
+            if slot_content(data, slot) == text:
+                log(f"{slot} unchanged")
+                return
+            op["seq"] = data["seq"] + 1
+            apply_op(data, op)
+            unsaved.append(op)
+            writer_q.put(op)
         log(f"{slot} ← {text[:60]}{'...' if len(text) > 60 else ''}")
 
     def paste(slot):
-        data = load_data()
-        if slot not in data["slots"]:
+        with data_lock:
+            refresh()
+            text = slot_content(data, slot)
+        if text is None:
             log(f"{slot} is empty")
             return
-        set_clipboard(data["slots"][slot]["content"])
+        set_clipboard(text)
         log(f"{slot} → clipboard")
 
     # Register hotkeys
     hotkeys = {}
-    for slot, (assign_key, paste_key) in slots.items():
-        # ensure no late-binding bug
-        hotkeys[assign_key] = (lambda s=slot: assign(s))
-        hotkeys[paste_key] = (lambda s=slot: paste(s))
+    for slot, (assign_key, paste_key) in SLOTS.items():
+        hotkeys[assign_key] = functools.partial(assign, slot)
+        hotkeys[paste_key] = functools.partial(paste, slot)
 
     log(f"Daemon started – global hotkeys active (platform={PLATFORM})")
     log("Available slots:")
-    for k, (a, p) in slots.items():
-        log(f"  {k}: assign {a} | paste {p}")
+    sys.stdout.write(SLOTS_LISTING)
     log("Press Ctrl+C to stop daemon")
 
-    with keyboard.GlobalHotKeys(hotkeys) as h:
-        h.join()
+    # Turn SIGTERM, and SIGHUP from closing the terminal, into a normal exit
+    # so the writer can flush below.
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), lambda signum, frame: sys.exit(0))
+
+    try:
+        with keyboard.GlobalHotKeys(hotkeys) as h:
+            h.join()
+    finally:
+        writer_q.put(None)
+        writer_thread.join()
 
 
 